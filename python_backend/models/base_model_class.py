@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 import json
 import os
+import queue
 import requests
+from urllib.parse import urlsplit
+
+import tritonclient.grpc as grpcclient
+import tritonclient.http as httpclient
 
 class BaseModelClass:
 
@@ -11,6 +17,12 @@ class BaseModelClass:
     called by the backend.
     '''
 
+    # Idle gRPC clients and the model metadata and config fetched by any
+    # client, keyed by (protocol, url, model_name). Model classes are created
+    # per request, so these are shared across instances.
+    _idle_clients = {}
+    _model_info = {}
+
     def __init__(self, client_info, url, model_name):
         '''
         Instantiate the classes with the information of the 
@@ -42,6 +54,61 @@ class BaseModelClass:
         else:
             return {'status': 'Model not found'}   
 
+    @contextmanager
+    def _triton_client(self, protocol, url, concurrency=1):
+        '''
+        Lends a triton client for the model along with its metadata and
+        config. gRPC clients go back to a shared pool afterwards, so
+        connections are reused across predictions while concurrent
+        predictions (which may open streams) never share a client. A
+        client whose prediction failed may be left in a broken state,
+        so it is closed instead of being pooled.
+
+        HTTP clients run on gevent, whose sockets only work on the thread
+        that created them, and flask serves each request on its own
+        thread. They are created with the given concurrency for every
+        prediction and closed afterwards; only their model info is cached.
+        '''
+        key = (protocol, url, self._model_name)
+        if protocol == 'grpc':
+            idle = BaseModelClass._idle_clients.setdefault(key, queue.LifoQueue())
+            try:
+                client = idle.get_nowait()
+            except queue.Empty:
+                client = grpcclient.InferenceServerClient(url=url)
+        else:
+            idle = None
+            client = httpclient.InferenceServerClient(url=url, concurrency=concurrency)
+        try:
+            if key not in BaseModelClass._model_info:
+                BaseModelClass._model_info[key] = (
+                    client.get_model_metadata(model_name=self._model_name),
+                    client.get_model_config(model_name=self._model_name))
+            model_metadata, model_config = BaseModelClass._model_info[key]
+            yield client, model_metadata, model_config
+        except BaseException:
+            # The clients exit through sys.exit on inference errors
+            client.close()
+            raise
+        if idle is None:
+            client.close()
+        else:
+            idle.put(client)
+
+    def _grpc_url(self):
+        '''
+        Returns the url of the triton gRPC endpoint. This is GRPC_API_URL
+        if set, otherwise port 8001 of the same host as the HTTP endpoint.
+        '''
+        grpc_url = os.environ.get('GRPC_API_URL')
+        if grpc_url:
+            return grpc_url
+        host = urlsplit(f'//{self._url}').hostname
+        if ':' in host:
+            # IPv6 literals need their brackets back once the port is added
+            host = f'[{host}]'
+        return f'{host}:8001'
+
     
     @abstractmethod
     def predict(self):
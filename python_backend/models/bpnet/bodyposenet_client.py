@@ -3,6 +3,7 @@ from functools import partial
 import logging
 import os
 import sys
+import uuid
 
 from attrdict import AttrDict
 import numpy as np
@@ -12,6 +13,7 @@ import tritonclient.grpc as grpcclient
 import tritonclient.http as httpclient
 from tritonclient.utils import InferenceServerException
 from tritonclient.utils import triton_to_np_dtype
+import tritonclient.utils.shared_memory as shm
 from tao_triton.python.types import Frame, UserData
 from tao_triton.python.postprocessing.bodyposenet_processor import BodyPoseNetPostprocessor
 from tao_triton.python.model.bodyposenet_model import BodyPoseNetModel
@@ -41,7 +43,7 @@ def convert_http_metadata_config(_metadata, _config):
 
 
 def requestGenerator(batched_image_data, input_name, output_name, dtype, protocol,
-                     num_classes=0):
+                     num_classes=0, shared_memory=None):
     """Generator for triton inference requests.
     Args:
         batch_image_data (np.ndarray): Numpy array of a batch of images.
@@ -51,6 +53,8 @@ def requestGenerator(batched_image_data, input_name, output_name, dtype, protoco
         protocol (str): The protocol used to communicated between the Triton
             server and TAO Toolkit client.
         num_classes (int): The number of classes in the network.
+        shared_memory (tuple): Optional (region_name, byte_size, offset) of a
+            registered shared memory region already holding the batch.
     Yields:
         inputs
         outputs
@@ -64,7 +68,10 @@ def requestGenerator(batched_image_data, input_name, output_name, dtype, protoco
 
     # Set the input data
     inputs = [client.InferInput(input_name, batched_image_data.shape, dtype)]
-    inputs[0].set_data_from_numpy(batched_image_data)
+    if shared_memory is None:
+        inputs[0].set_data_from_numpy(batched_image_data)
+    else:
+        inputs[0].set_shared_memory(*shared_memory)
 
     outputs = [
         client.InferRequestedOutput(
@@ -97,36 +104,44 @@ def bodyposenet_predict(**FLAGS):
     if FLAGS['streaming'] and FLAGS['protocol'].lower() != "grpc":
         raise Exception("Streaming is only allowed with gRPC protocol")
 
-    try:
-        if FLAGS['protocol'].lower() == "grpc":
-            # Create gRPC client for communicating with the server
-            triton_client = grpcclient.InferenceServerClient(
-                url=FLAGS['url'], verbose=FLAGS['verbose'])
-        else:
-            # Specify large enough concurrency to handle the
-            # the number of requests.
-            concurrency = 500 if FLAGS['async_set'] else 1
-            triton_client = httpclient.InferenceServerClient(
-                url=FLAGS['url'], verbose=FLAGS['verbose'], concurrency=concurrency)
-    except Exception as e:
-        print("client creation failed: " + str(e))
-        sys.exit(1)
+    # A client, model metadata and config may be passed in to reuse them
+    # across predictions instead of recreating them for every call.
+    triton_client = FLAGS.get('client')
+    if triton_client is None:
+        try:
+            if FLAGS['protocol'].lower() == "grpc":
+                # Create gRPC client for communicating with the server
+                triton_client = grpcclient.InferenceServerClient(
+                    url=FLAGS['url'], verbose=FLAGS['verbose'])
+            else:
+                # Specify large enough concurrency to handle the
+                # the number of requests.
+                concurrency = 500 if FLAGS['async_set'] else 1
+                triton_client = httpclient.InferenceServerClient(
+                    url=FLAGS['url'], verbose=FLAGS['verbose'], concurrency=concurrency)
+        except Exception as e:
+            print("client creation failed: " + str(e))
+            sys.exit(1)
 
     # Make sure the model matches our requirements, and get some
     # properties of the model that we need for preprocessing
-    try:
-        model_metadata = triton_client.get_model_metadata(
-            model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
-    except InferenceServerException as e:
-        print("failed to retrieve the metadata: " + str(e))
-        sys.exit(1)
-
-    try:
-        model_config = triton_client.get_model_config(
-            model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
-    except InferenceServerException as e:
-        print("failed to retrieve the config: " + str(e))
-        sys.exit(1)
+    model_metadata = FLAGS.get('model_metadata')
+    if model_metadata is None:
+        try:
+            model_metadata = triton_client.get_model_metadata(
+                model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
+        except InferenceServerException as e:
+            print("failed to retrieve the metadata: " + str(e))
+            sys.exit(1)
+
+    model_config = FLAGS.get('model_config')
+    if model_config is None:
+        try:
+            model_config = triton_client.get_model_config(
+                model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
+        except InferenceServerException as e:
+            print("failed to retrieve the config: " + str(e))
+            sys.exit(1)
 
     if FLAGS['protocol'].lower() == "grpc":
         model_config = model_config.config
@@ -147,15 +162,17 @@ def bodyposenet_predict(**FLAGS):
     max_batch_size = triton_model.max_batch_size
     frames = []
     if os.path.isdir(FLAGS['image_filename']):
-        frames = [
-            Frame(os.path.join(FLAGS['image_filename'], f),
-                  triton_model.data_format,
-                  npdtype,
-                  target_shape)
-            for f in os.listdir(FLAGS['image_filename'])
-            if os.path.isfile(os.path.join(FLAGS['image_filename'], f)) and
-            os.path.splitext(f)[-1] in [".jpg", ".jpeg", ".png"]
-        ]
+        # scandir caches the entry type, avoiding an extra stat per file.
+        with os.scandir(FLAGS['image_filename']) as entries:
+            frames = [
+                Frame(entry.path,
+                      triton_model.data_format,
+                      npdtype,
+                      target_shape)
+                for entry in entries
+                if entry.is_file() and
+                os.path.splitext(entry.name)[-1].lower() in [".jpg", ".jpeg", ".png"]
+            ]
     else:
         frames = [
             Frame(os.path.join(FLAGS['image_filename']),
@@ -186,101 +203,131 @@ def bodyposenet_predict(**FLAGS):
 
     sent_count = 0
 
-    if FLAGS['streaming']:
-        triton_client.start_stream(partial(completion_callback, user_data))
-
-    logger.info("Sending inference request for batches of data")
-    with tqdm(total=len(frames)) as pbar:
-        while not last_request:
-            input_filenames = []
-            repeated_image_data = []
-
-            for idx in range(FLAGS['batch_size']):
-                frame = frames[image_idx]
-                img = frame.load_image()
-                repeated_image_data.append(
+    # Images are preprocessed straight into this buffer. The request inputs
+    # copy it when they are created, so it is safe to reuse for every batch.
+    batched_image_data = np.empty(
+        (FLAGS['batch_size'],) + tuple(target_shape), dtype=npdtype)
+
+    # With shared memory, every batch is copied into its own slot of a
+    # system shared memory region registered with the server instead of
+    # being serialized into the request. The server must run on this host.
+    # The region is unregistered and destroyed in the finally block below,
+    # so it does not leak when a batch fails. The stream is stopped there
+    # too, so that the client can start a new one for the next prediction.
+    shm_handle = None
+    try:
+        if FLAGS.get('shared_memory'):
+            batch_byte_size = batched_image_data.nbytes
+            if max_batch_size <= 0:
+                batch_byte_size = batched_image_data[0].nbytes
+            region_byte_size = batch_byte_size * -(-len(frames) // FLAGS['batch_size'])
+            shm_region = "{}_input_{}".format(FLAGS['model_name'], uuid.uuid4().hex)
+            shm_handle = shm.create_shared_memory_region(
+                shm_region, "/" + shm_region, region_byte_size)
+            triton_client.register_system_shared_memory(
+                shm_region, "/" + shm_region, region_byte_size)
+
+        if FLAGS['streaming']:
+            triton_client.start_stream(partial(completion_callback, user_data))
+
+        logger.info("Sending inference request for batches of data")
+        with tqdm(total=len(frames)) as pbar:
+            while not last_request:
+                input_filenames = []
+
+                for idx in range(FLAGS['batch_size']):
+                    frame = frames[image_idx]
+                    img = frame.load_image()
                     triton_model.preprocess(
-                        frame.as_numpy(img)
+                        frame.as_numpy(img), out=batched_image_data[idx]
                     )
-                )
-                image_idx = (image_idx + 1) % len(frames)
-                if image_idx == 0:
-                    last_request = True
-
-            if max_batch_size > 0:
-                batched_image_data = np.stack(repeated_image_data, axis=0)
-            else:
-                batched_image_data = repeated_image_data[0]
-
-            # Send request
-            try:
-                req_gen_args = [batched_image_data, triton_model.input_names,
-                                triton_model.output_names, triton_model.triton_dtype,
-                                FLAGS['protocol'].lower()]
-                req_gen_kwargs = {}
-                req_generator = requestGenerator(
-                    *req_gen_args, **req_gen_kwargs)
-                for inputs, outputs in req_generator:
-                    sent_count += 1
-                    if FLAGS['streaming']:
-                        triton_client.async_stream_infer(
-                            FLAGS['model_name'],
-                            inputs,
-                            request_id=str(sent_count),
-                            model_version=FLAGS['model_version'],
-                            outputs=outputs)
-                    elif FLAGS['async_set']:
-                        if FLAGS['protocol'].lower() == "grpc":
-                            triton_client.async_infer(
+                    image_idx = (image_idx + 1) % len(frames)
+                    if image_idx == 0:
+                        last_request = True
+
+                if max_batch_size > 0:
+                    request_image_data = batched_image_data
+                else:
+                    request_image_data = batched_image_data[0]
+
+                # Send request
+                try:
+                    req_gen_args = [request_image_data, triton_model.input_names,
+                                    triton_model.output_names, triton_model.triton_dtype,
+                                    FLAGS['protocol'].lower()]
+                    req_gen_kwargs = {}
+                    if shm_handle is not None:
+                        offset = sent_count * batch_byte_size
+                        shm.set_shared_memory_region(
+                            shm_handle, [request_image_data], offset=offset)
+                        req_gen_kwargs["shared_memory"] = (
+                            shm_region, batch_byte_size, offset)
+                    req_generator = requestGenerator(
+                        *req_gen_args, **req_gen_kwargs)
+                    for inputs, outputs in req_generator:
+                        sent_count += 1
+                        if FLAGS['streaming']:
+                            triton_client.async_stream_infer(
                                 FLAGS['model_name'],
                                 inputs,
-                                partial(completion_callback, user_data),
                                 request_id=str(sent_count),
                                 model_version=FLAGS['model_version'],
                                 outputs=outputs)
-                        else:
-                            async_requests.append(
+                        elif FLAGS['async_set']:
+                            if FLAGS['protocol'].lower() == "grpc":
                                 triton_client.async_infer(
                                     FLAGS['model_name'],
                                     inputs,
+                                    partial(completion_callback, user_data),
                                     request_id=str(sent_count),
                                     model_version=FLAGS['model_version'],
-                                    outputs=outputs))
-                    else:
-                        responses.append(
-                            triton_client.infer(FLAGS['model_name'],
-                                                inputs,
-                                                request_id=str(sent_count),
-                                                model_version=FLAGS['model_version'],
-                                                outputs=outputs))
-
-            except InferenceServerException as e:
-                print("inference failed: " + str(e))
-                if FLAGS['streaming']:
-                    triton_client.stop_stream()
-                sys.exit(1)
-
-            pbar.update(FLAGS['batch_size'])
+                                    outputs=outputs)
+                            else:
+                                async_requests.append(
+                                    triton_client.async_infer(
+                                        FLAGS['model_name'],
+                                        inputs,
+                                        request_id=str(sent_count),
+                                        model_version=FLAGS['model_version'],
+                                        outputs=outputs))
+                        else:
+                            responses.append(
+                                triton_client.infer(FLAGS['model_name'],
+                                                    inputs,
+                                                    request_id=str(sent_count),
+                                                    model_version=FLAGS['model_version'],
+                                                    outputs=outputs))
+
+                except InferenceServerException as e:
+                    print("inference failed: " + str(e))
+                    sys.exit(1)
 
-    if FLAGS['streaming']:
-        triton_client.stop_stream()
+                pbar.update(FLAGS['batch_size'])
 
-    if FLAGS['protocol'].lower() == "grpc":
-        if FLAGS['streaming'] or FLAGS['async_set']:
-            processed_count = 0
-            while processed_count < sent_count:
-                (results, error) = user_data._completed_requests.get()
-                processed_count += 1
-                if error is not None:
-                    print("inference failed: " + str(error))
-                    sys.exit(1)
-                responses.append(results)
-    else:
-        if FLAGS['async_set']:
-            # Collect results from the ongoing async requests
-            # for HTTP Async requests.
-            for async_request in async_requests:
-                responses.append(async_request.get_result())
+        if FLAGS['protocol'].lower() == "grpc":
+            if FLAGS['streaming'] or FLAGS['async_set']:
+                processed_count = 0
+                while processed_count < sent_count:
+                    (results, error) = user_data._completed_requests.get()
+                    processed_count += 1
+                    if error is not None:
+                        print("inference failed: " + str(error))
+                        sys.exit(1)
+                    responses.append(results)
+        else:
+            if FLAGS['async_set']:
+                # Collect results from the ongoing async requests
+                # for HTTP Async requests.
+                for async_request in async_requests:
+                    responses.append(async_request.get_result())
+    finally:
+        if FLAGS['streaming']:
+            triton_client.stop_stream()
+        if shm_handle is not None:
+            try:
+                triton_client.unregister_system_shared_memory(shm_region)
+            finally:
+                shm.destroy_shared_memory_region(shm_handle)
 
     results = {}
     tensor_response = []
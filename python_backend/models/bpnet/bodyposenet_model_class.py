@@ -51,16 +51,37 @@ class BodyPoseNetClass(BaseModelClass):
         else:
             raise FileNotFoundError("File Path does not exist!")
 
+    def _select_batch_size(self, number_files, model_config):
+        '''
+        Returns the batch size to send requests with, aligned to the
+        preferred batch sizes of triton's dynamic batcher. Small requests
+        use the smallest preferred size that fits them, larger ones the
+        largest that splits the images evenly. Batches are padded with
+        repeated images, so without preferred sizes the batch is capped
+        at the number of images.
+        '''
+        preferred = list(model_config.dynamic_batching.preferred_batch_size)
+        max_batch_size = model_config.max_batch_size
+        if max_batch_size > 0:
+            preferred = [size for size in preferred if size <= max_batch_size]
+        if not preferred:
+            return max(min(max_batch_size, number_files), 1)
+        fitting = [size for size in preferred if size >= number_files]
+        if fitting:
+            return min(fitting)
+        even = [size for size in preferred if number_files % size == 0]
+        return max(even or preferred)
+
     def _predict(self, file_path, return_tensor):
-        number_files = len([name for name in os.listdir(
-            file_path) if os.path.isfile(file_path+name)])
-        if number_files < 256:
-            self._batch_size = 8
-        else:
-            self._batch_size = 16
-        return bodyposenet_predict(model_name=self._model_name, mode=self._mode, url=self._url,
-                                   image_filename=file_path, output_path='./', verbose=False, streaming=False, async_set=False,
-                                   protocol='HTTP', model_version="", batch_size=self._batch_size, return_tensor=return_tensor)
+        with os.scandir(file_path) as entries:
+            number_files = sum(1 for entry in entries if entry.is_file())
+        with self._triton_client('grpc', self._grpc_url()) as (client, model_metadata, model_config):
+            self._batch_size = self._select_batch_size(number_files, model_config.config)
+            return bodyposenet_predict(model_name=self._model_name, mode=self._mode, url=self._grpc_url(),
+                                       image_filename=file_path, output_path='./', verbose=False, streaming=True, async_set=True,
+                                       protocol='grpc', model_version="", batch_size=self._batch_size, return_tensor=return_tensor,
+                                       client=client, model_metadata=model_metadata, model_config=model_config,
+                                       shared_memory=os.environ.get('TRITON_SHARED_MEMORY', '').lower() == 'true')
 
 
 if __name__ == '__main__':
@@ -2,6 +2,7 @@ from app import app
 from flask import request, send_file, make_response
 from flask_cors import CORS, cross_origin
 from utils.utils import create_directories, check_request, crop_image, render_image, replace_in_markdown, save_image, filter_overlapping_bbox
+from PIL import Image
 from models.lpdlprnet.lpdlprutils import chop_image, draw_confidence_heat_map
 import pandas as pd
 import datetime
@@ -90,6 +91,7 @@ def call_combined(id):
             else:
                 # info is a list of bbox, bbox is a dict containing a list (bbox)
                 # and a single number, confidence score
+                image = Image.open(images[info['file_name']])
                 for j, bbox_info in enumerate(info["all_bboxes"]):
                     
                     confidence_score=bbox_info['confidence_score']
@@ -97,7 +99,7 @@ def call_combined(id):
                         del info["all_bboxes"][j]
                         continue
                     
-                    crop_image(images[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}")
+                    crop_image(images[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}",image=image)
 
                     reverse_mapping[f"{j}_{info['file_name']}"] = i #Tracking multiple bbox in an image
 
@@ -217,8 +219,9 @@ def call_explain_combined(id):
     else:
         # info is a list of bbox, bbox is a dict containing a list (bbox)
         # and a single number, confidence score
+        image = Image.open(images[info['file_name']])
         for j, bbox_info in enumerate(info["all_bboxes"]):
-            crop_image(images[info['file_name']],bbox_info['bbox'],lpdout)
+            crop_image(images[info['file_name']],bbox_info['bbox'],lpdout,image=image)
             reverse_mapping[f"exp_{info['file_name']}"] = i
             bbox_info[f"exp_bbox"] = bbox_info.pop('bbox')
 
@@ -1,5 +1,6 @@
 import cv2 as cv
 import numpy as np
+from scipy.ndimage import find_objects
 
 def segment_by_color(im_path, n): #
     from skimage.segmentation import slic
@@ -18,10 +19,12 @@ def chop_image(im_path, n):
     Chop image into n segments
     """
     segments, org = segment_by_color(im_path, n)
+    # Bounding box of every segment, so masking only touches that region
+    slices = find_objects(segments + 1)
     response = []
     for v in np.unique(segments):
         copy = org.copy()
-        copy[segments == v] = 0
+        copy[slices[v]][segments[slices[v]] == v] = 0
         response.append(copy)
     return response
 
@@ -47,9 +50,10 @@ def color_chunks(original_image_path, conf, save_as, n=2):
 
     norm_coef = (coef)/max(abs(coef))
 
+    slices = find_objects(segments + 1)
     for v in np.unique(segments):
         try:
-            im[segments == v] = color(norm_coef[v], coef[v])
+            im[slices[v]][segments[slices[v]] == v] = color(norm_coef[v], coef[v])
         except:
             pass
 
@@ -65,19 +69,16 @@ def draw_confidence_heat_map(responses, filename, save_as, n):
 
 
 def get_coefficients(conf):
-    import pandas as pd
-    from sklearn.preprocessing import OneHotEncoder
-    from sklearn.linear_model import LinearRegression
-    enc = OneHotEncoder()
-    df = pd.DataFrame([int(k) for k,v in conf.items() if k.isdigit() ])
-    y = [v for k,v in conf.items() if k.isdigit()]
-    full_image = [v for k,v in conf.items() if not k.isdigit()][0]
-    y.append(full_image)
-    X = 1-enc.fit_transform(df).toarray()
-    X = np.append(X,[len(X)*[1]], axis=0)
-    reg = LinearRegression().fit(X, y)
-
-    return reg.coef_
+    """
+    Contribution of each segment to the confidence score. Regressing the
+    scores on 1 - OneHot(segment) plus an all-ones row for the full image
+    is exactly determined, so the coefficient of a segment is the drop in
+    confidence when that segment is blacked out.
+    """
+    segments = sorted((int(k), v) for k, v in conf.items() if k.isdigit())
+    full_image = [v for k, v in conf.items() if not k.isdigit()][0]
+    y = np.fromiter((v for _, v in segments), dtype=np.float64, count=len(segments))
+    return full_image - y
 
 def color(norm, coef):
     if coef > 0 :
@@ -20,13 +20,13 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import argparse
-from copy import deepcopy
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import sys
 
 from attrdict import AttrDict
+from numba.typed import List
 import numpy as np
 from PIL import Image
 from tqdm import tqdm
@@ -41,6 +41,7 @@ from tao_triton.python.types import Frame, UserData
 from tao_triton.python.postprocessing.lprnet_postprocessor import LprnetPostprocessor
 from tao_triton.python.utils.kitti import write_kitti_annotation
 from tao_triton.python.model.lprnet_model import LprnetModel
+from tao_triton.python.preprocessing.lpr_preprocessing import load_raw_image, lpr_preprocess_batch
 
 logger = logging.getLogger(__name__)
 
@@ -52,11 +53,6 @@ POSTPROCESSOR_DICT = {
     "lprnet": LprnetPostprocessor
 }
 
-def completion_callback(user_data, result, error):
-    """Callback function used for async_stream_infer()."""
-    user_data._completed_requests.put((result, error))
-
-
 def convert_http_metadata_config(_metadata, _config):
     """Convert to the http metadata to class Dict."""
     _model_metadata = AttrDict(_metadata)
@@ -121,62 +117,81 @@ def lpr_predict(**FLAGS):
                                '%(name)s: %(message)s',
                         level=log_level)
 
-    if FLAGS['streaming'] and FLAGS['protocol'].lower() != "grpc":
+    # Flags used per batch are looked up once here rather than in the loops
+    protocol = FLAGS['protocol'].lower()
+    mode = FLAGS['mode'].lower()
+    model_name = FLAGS['model_name']
+    model_version = FLAGS['model_version']
+    batch_size = FLAGS['batch_size']
+    streaming = FLAGS['streaming']
+    async_set = FLAGS['async_set']
+
+    if streaming and protocol != "grpc":
         raise Exception("Streaming is only allowed with gRPC protocol")
 
-    try:
-        if FLAGS['protocol'].lower() == "grpc":
-            # Create gRPC client for communicating with the server
-            triton_client = grpcclient.InferenceServerClient(
-                url=FLAGS['url'], verbose=FLAGS['verbose'])
-        else:
-            # Specify large enough concurrency to handle the
-            # the number of requests.
-            concurrency = 500 if FLAGS['async_set'] else 1
-            triton_client = httpclient.InferenceServerClient(
-                url=FLAGS['url'], verbose=FLAGS['verbose'], concurrency=concurrency)
-    except Exception as e:
-        print("client creation failed: " + str(e))
-        sys.exit(1)
+    # A client, model metadata and config may be passed in to reuse them
+    # across predictions instead of recreating them for every call.
+    triton_client = FLAGS.get('client')
+    if triton_client is None:
+        try:
+            if protocol == "grpc":
+                # Create gRPC client for communicating with the server
+                triton_client = grpcclient.InferenceServerClient(
+                    url=FLAGS['url'], verbose=FLAGS['verbose'])
+            else:
+                # Specify large enough concurrency to handle the
+                # the number of requests.
+                concurrency = 500 if async_set else 1
+                triton_client = httpclient.InferenceServerClient(
+                    url=FLAGS['url'], verbose=FLAGS['verbose'], concurrency=concurrency)
+        except Exception as e:
+            print("client creation failed: " + str(e))
+            sys.exit(1)
 
     # Make sure the model matches our requirements, and get some
     # properties of the model that we need for preprocessing
-    try:
-        model_metadata = triton_client.get_model_metadata(
-            model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
-    except InferenceServerException as e:
-        print("failed to retrieve the metadata: " + str(e))
-        sys.exit(1)
-
-    try:
-        model_config = triton_client.get_model_config(
-            model_name=FLAGS['model_name'], model_version=FLAGS['model_version'])
-    except InferenceServerException as e:
-        print("failed to retrieve the config: " + str(e))
-        sys.exit(1)
-
-    if FLAGS['protocol'].lower() == "grpc":
+    model_metadata = FLAGS.get('model_metadata')
+    if model_metadata is None:
+        try:
+            model_metadata = triton_client.get_model_metadata(
+                model_name=model_name, model_version=model_version)
+        except InferenceServerException as e:
+            print("failed to retrieve the metadata: " + str(e))
+            sys.exit(1)
+
+    model_config = FLAGS.get('model_config')
+    if model_config is None:
+        try:
+            model_config = triton_client.get_model_config(
+                model_name=model_name, model_version=model_version)
+        except InferenceServerException as e:
+            print("failed to retrieve the config: " + str(e))
+            sys.exit(1)
+
+    if protocol == "grpc":
         model_config = model_config.config
     else:
         model_metadata, model_config = convert_http_metadata_config(
             model_metadata, model_config)
 
-    triton_model = TRITON_MODEL_DICT[FLAGS['mode'].lower()].from_metadata(model_metadata, model_config)
+    triton_model = TRITON_MODEL_DICT[mode].from_metadata(model_metadata, model_config)
     target_shape = (triton_model.c, triton_model.h, triton_model.w)
     npdtype = triton_to_np_dtype(triton_model.triton_dtype)
     max_batch_size = triton_model.max_batch_size
     frames = []
     if os.path.isdir(FLAGS['image_filename']):
         #Converts image input to a Frame Object for inference
-        frames = [
-            Frame(os.path.join(FLAGS['image_filename'], f),
-                  triton_model.data_format,
-                  npdtype,
-                  target_shape)
-            for f in os.listdir(FLAGS['image_filename'])
-            if os.path.isfile(os.path.join(FLAGS['image_filename'], f)) and
-            os.path.splitext(f)[-1] in [".jpg", ".jpeg", ".png"]
-        ]
+        # scandir caches the entry type, avoiding an extra stat per file.
+        with os.scandir(FLAGS['image_filename']) as entries:
+            frames = [
+                Frame(entry.path,
+                      triton_model.data_format,
+                      npdtype,
+                      target_shape)
+                for entry in entries
+                if entry.is_file() and
+                os.path.splitext(entry.name)[-1].lower() in [".jpg", ".jpeg", ".png"]
+            ]
     else:
         frames = [
             Frame(os.path.join(FLAGS['image_filename']),
@@ -197,119 +212,132 @@ def lpr_predict(**FLAGS):
     user_data = UserData()
     class_list = FLAGS['class_list'].split(",")
     args_postprocessor = [
-        FLAGS['batch_size'], frames, FLAGS['output_path'], triton_model.data_format, FLAGS['mapping_output_file']
+        batch_size, frames, FLAGS['output_path'], triton_model.data_format, FLAGS['mapping_output_file']
     ]
     # if FLAGS['mode'].lower() == "detectnet_v2":
     #     args_postprocessor.extend([class_list, FLAGS['postprocessing_config'], target_shape])
     # elif FLAGS['mode'].lower() == "lprnet":
     #     args_postprocessor.append(FLAGS['mapping_output_file'])
-    postprocessor = POSTPROCESSOR_DICT[FLAGS['mode'].lower()](*args_postprocessor)
+    postprocessor = POSTPROCESSOR_DICT[mode](*args_postprocessor)
 
     # Holds the handles to the ongoing HTTP async requests.
     async_requests = []
 
     sent_count = 0
 
-    if FLAGS['streaming']:
-        triton_client.start_stream(partial(completion_callback, user_data))
+    def completion_callback(result, error):
+        """Callback function used for async_stream_infer()."""
+        user_data._completed_requests.put((result, error))
+
+    def send_request(inputs, outputs, request_id):
+        """Sends one batch request with the configured protocol and mode."""
+        if streaming:
+            triton_client.async_stream_infer(
+                model_name,
+                inputs,
+                request_id=request_id,
+                model_version=model_version,
+                outputs=outputs)
+        elif async_set and protocol == "grpc":
+            triton_client.async_infer(
+                model_name,
+                inputs,
+                completion_callback,
+                request_id=request_id,
+                model_version=model_version,
+                outputs=outputs)
+        elif async_set:
+            async_requests.append(
+                triton_client.async_infer(
+                    model_name,
+                    inputs,
+                    request_id=request_id,
+                    model_version=model_version,
+                    outputs=outputs))
+        else:
+            responses.append(
+                triton_client.infer(model_name,
+                                    inputs,
+                                    request_id=request_id,
+                                    model_version=model_version,
+                                    outputs=outputs))
+
+    if streaming:
+        triton_client.start_stream(completion_callback)
 
     logger.info("Sending inference request for batches of data")
-    with tqdm(total=len(frames)) as pbar:
+    # Images of the next batch are decoded by a pool of worker threads while
+    # the current batch is being preprocessed and sent to the server.
+    channels_first = triton_model.data_format == mc.ModelInput.FORMAT_NCHW
+    if channels_first:
+        batch_shape = (triton_model.c, triton_model.h, triton_model.w)
+    else:
+        batch_shape = (triton_model.h, triton_model.w, triton_model.c)
+    # The request inputs copy this buffer, so it is safe to reuse it.
+    batched_image_data = np.empty((batch_size,) + batch_shape, dtype=npdtype)
+    mean = triton_model.mean.reshape(-1).astype(np.float32)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor, \
+            tqdm(total=len(frames)) as pbar:
+
+        def submit_batch(start_idx):
+            """Schedule decoding of the batch starting at start_idx."""
+            return [
+                executor.submit(load_raw_image,
+                                frames[(start_idx + idx) % len(frames)]._image_path,
+                                triton_model.c)
+                for idx in range(batch_size)
+            ]
+
+        pending_batch = submit_batch(image_idx)
         while not last_request:
             input_filenames = []
-            repeated_image_data = []
-
-            for idx in range(FLAGS['batch_size']):
-                frame = frames[image_idx]
-                img = frame.load_image()
-                repeated_image_data.append(
-                    triton_model.preprocess(
-                        frame.as_numpy(img)
-                    )
-                )
-                image_idx = (image_idx + 1) % len(frames)
-                if image_idx == 0:
-                    last_request = True
+            current_batch = pending_batch
+
+            image_idx += batch_size
+            if image_idx >= len(frames):
+                last_request = True
+            else:
+                pending_batch = submit_batch(image_idx)
+
+            # Futures are kept in submission order so the batch layout
+            # matches the frame ordering expected by the postprocessor.
+            raw_images = List()
+            for future in current_batch:
+                raw_images.append(future.result())
+            lpr_preprocess_batch(raw_images, batched_image_data, mean,
+                                 triton_model.scale, channels_first)
 
             if max_batch_size > 0:
-                batched_image_data = np.stack(repeated_image_data, axis=0)
+                request_image_data = batched_image_data
             else:
-                batched_image_data = repeated_image_data[0]
+                request_image_data = batched_image_data[0]
 
             # Send request to triton server for inference
             try:
-                req_gen_args = [batched_image_data, triton_model.input_names,
+                req_gen_args = [request_image_data, triton_model.input_names,
                     triton_model.output_names, triton_model.triton_dtype,
-                    FLAGS['protocol'].lower()]
+                    protocol]
                 req_gen_kwargs = {}
-                if FLAGS['mode'].lower() == "classification":
+                if mode == "classification":
                     req_gen_kwargs["num_classes"] = model_config.output[0].dims[0]
                 req_generator = requestGenerator(*req_gen_args, **req_gen_kwargs)
                 for inputs, outputs in req_generator:
                     sent_count += 1
-                    if FLAGS['streaming']:
-                        triton_client.async_stream_infer(
-                            FLAGS['model_name'],
-                            inputs,
-                            request_id=str(sent_count),
-                            model_version=FLAGS['model_version'],
-                            outputs=outputs)
-                    elif FLAGS['async_set']:
-                        if FLAGS['protocol'].lower() == "grpc":
-                            triton_client.async_infer(
-                                FLAGS['model_name'],
-                                inputs,
-                                partial(completion_callback, user_data),
-                                request_id=str(sent_count),
-                                model_version=FLAGS['model_version'],
-                                outputs=outputs)
-                        else:
-                            async_requests.append(
-                                triton_client.async_infer(
-                                    FLAGS['model_name'],
-                                    inputs,
-                                    request_id=str(sent_count),
-                                    model_version=FLAGS['model_version'],
-                                    outputs=outputs))
-                    else:
-                        responses.append(
-                            triton_client.infer(FLAGS['model_name'],
-                                                inputs,
-                                                request_id=str(sent_count),
-                                                model_version=FLAGS['model_version'],
-                                                outputs=outputs))
+                    send_request(inputs, outputs, str(sent_count))
 
             except InferenceServerException as e:
                 print("inference failed: " + str(e))
-                if FLAGS['streaming']:
+                if streaming:
                     triton_client.stop_stream()
                 sys.exit(1)
             
-            pbar.update(FLAGS['batch_size'])
+            pbar.update(batch_size)
 
-    if FLAGS['streaming']:
+    if streaming:
         triton_client.stop_stream()
 
-    if FLAGS['protocol'].lower() == "grpc":
-        if FLAGS['streaming'] or FLAGS['async_set']:
-            processed_count = 0
-            while processed_count < sent_count:
-                (results, error) = user_data._completed_requests.get()
-                processed_count += 1
-                if error is not None:
-                    print("inference failed: " + str(error))
-                    sys.exit(1)
-                responses.append(results)
-    else:
-        if FLAGS['async_set']:
-            # Collect results from the ongoing async requests
-            # for HTTP Async requests.
-            for async_request in async_requests:
-                responses.append(async_request.get_result())
-
     # Processes response from triton server after inference
     logger.info("Gathering responses from the server and post processing the inferenced outputs.")
-    processed_request = 0
     final_response = []
 
     '''
@@ -318,26 +346,44 @@ def lpr_predict(**FLAGS):
 
     mapping_output_file = FLAGS['mapping_output_file']
     with open(mapping_output_file) as f:
-        lines = f.read().splitlines()
-        mapping_dictionary = {k:v for k,v in enumerate(lines)} #Creating mapping dictionary for mapping
-
-    with tqdm(total=len(frames)) as pbar:
-
-        '''
-        Loops through all batches to apply post processing to images in the batch
-        '''
-        
-        while processed_request < sent_count:
-            response = responses[processed_request]
-            if FLAGS['protocol'].lower() == "grpc":
-                this_id = response.get_response().id
-            else:
-                this_id = response.get_response()["id"]
-            batch_results = postprocessor.apply(
-                response, this_id, mapping_dictionary, render=True
-            )
-            processed_request += 1
-            pbar.update(FLAGS['batch_size'])
+        mapping_list = f.read().splitlines() #Characters indexed by model output class
+
+    def completed_responses():
+        """Yields the batch responses from the server as they are received."""
+        if not (streaming or async_set):
+            yield from responses
+            return
+        if async_requests:
+            # Collect results from the ongoing async requests
+            # for HTTP Async requests.
+            for async_request in async_requests:
+                yield async_request.get_result()
+            return
+        for _ in range(sent_count):
+            (results, error) = user_data._completed_requests.get()
+            if error is not None:
+                print("inference failed: " + str(error))
+                sys.exit(1)
+            yield results
+
+    def postprocess(response):
+        """Applies the postprocessor to the images of one batch response."""
+        if protocol == "grpc":
+            this_id = response.get_response().id
+        else:
+            this_id = response.get_response()["id"]
+        return postprocessor.apply(response, this_id, mapping_list, render=True)
+
+    # Batches are postprocessed on a thread pool as soon as their response
+    # arrives, overlapping with the responses that are still in flight.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor, \
+            tqdm(total=len(frames)) as pbar:
+        futures = [executor.submit(postprocess, response)
+                   for response in completed_responses()]
+
+        for future in futures:
+            batch_results = future.result()
+            pbar.update(batch_size)
 
             '''
             For each image in each batch, save final response and output in appropriate format to backend
@@ -350,5 +396,5 @@ def lpr_predict(**FLAGS):
                     final_image_response = {"HTTPStatus": 204, "file_name": filename, "license_plate": license_plate, "confidence_scores":confidence_scores_indv_image}
                     final_response.append(final_image_response)
 
-    logger.info("{} PASS".format(FLAGS['mode'].lower()))
+    logger.info("{} PASS".format(mode))
     return final_response
@@ -47,17 +47,22 @@ class LprModelClass(BaseModelClass):
                      'error': "File Path does not exist!"}]
 
     def _predict(self, file_path):
-        number_files = len([name for name in os.listdir(
-            file_path) if os.path.isfile(file_path+name)])
+        with os.scandir(file_path) as entries:
+            number_files = sum(1 for entry in entries if entry.is_file())
         print(number_files)
         if number_files < 256:
             self._batch_size = 8
         else:
             self._batch_size = 16
-        return lpr_predict(model_name=self._model_name, mode=self._mode, class_list=self._class_list,
-                           output_path="./",  url=self._url, image_filename=file_path, verbose=False,
-                           streaming=False, async_set=False, protocol='HTTP', model_version="", batch_size=self._batch_size,
-                           mapping_output_file=self._mapping_output_file )
+        async_set = False
+        # Large enough concurrency to handle the number of async requests
+        concurrency = 500 if async_set else 1
+        with self._triton_client('http', self._url, concurrency) as (client, model_metadata, model_config):
+            return lpr_predict(model_name=self._model_name, mode=self._mode, class_list=self._class_list,
+                               output_path="./",  url=self._url, image_filename=file_path, verbose=False,
+                               streaming=False, async_set=async_set, protocol='HTTP', model_version="", batch_size=self._batch_size,
+                               mapping_output_file=self._mapping_output_file, client=client,
+                               model_metadata=model_metadata, model_config=model_config)
 
 
 if __name__ == "__main__":
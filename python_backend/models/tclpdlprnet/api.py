@@ -2,6 +2,7 @@ from app import app
 from flask import request, send_file, make_response
 from flask_cors import CORS, cross_origin
 from utils.utils import create_directories, check_request, crop_image, render_image, save_image, filter_overlapping_bbox
+from PIL import Image
 
 import shutil
 import json
@@ -96,6 +97,7 @@ def call_tclpdlpr_combined(id):
             else:
                 # info is a list of bbox, bbox is a dict containing a list (bbox)
                 # and a single number, confidence score
+                image = Image.open(tcn_input[info['file_name']])
                 for j, bbox_info in enumerate(info["all_bboxes"]):
                     
                     confidence_score=bbox_info['confidence_score']
@@ -103,7 +105,7 @@ def call_tclpdlpr_combined(id):
                         del info["all_bboxes"][j]
                         continue
                     
-                    crop_image(tcn_input[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}")
+                    crop_image(tcn_input[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}",image=image)
         
                     tcn_mapping[f"{j}_{info['file_name']}"] = info['file_name']
                 
@@ -143,6 +145,7 @@ def call_tclpdlpr_combined(id):
             else:
                 # info is a list of bbox, bbox is a dict containing a list (bbox)
                 # and a single number, confidence score
+                image = Image.open(lpd_input[info['file_name']])
                 for j, bbox_info in enumerate(info["all_bboxes"]):
                     
                     confidence_score=bbox_info['confidence_score']
@@ -150,7 +153,7 @@ def call_tclpdlpr_combined(id):
                         del info["all_bboxes"][j]
                         continue
                     
-                    crop_image(lpd_input[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}")
+                    crop_image(lpd_input[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}",image=image)
 
                     lpd_mapping[f"{j}_{info['file_name']}"] = info['file_name'] #Tracking multiple bbox in an image
 
@@ -1,6 +1,7 @@
 from app import app
 from flask import request, send_file, make_response
 from flask_cors import CORS, cross_origin
+from PIL import Image
 from utils.utils import create_directories, check_request, crop_image, render_image, filter_overlapping_bbox
 
 import json
@@ -78,9 +79,10 @@ def call_trafficcamnet(id):
             else:
                 # info is a list of bbox, bbox is a dict containing a list (bbox)
                 # and a single number, confidence score
+                image = Image.open(images[info['file_name']])
                 for j, bbox_info in enumerate(info["all_bboxes"]):
                     
-                    if LOGGING: crop_image(images[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}")
+                    if LOGGING: crop_image(images[info['file_name']],bbox_info['bbox'],f"{output_path}/{j}_{info['file_name']}",image=image)
 
                     confidence_score=bbox_info['confidence_score']
                     if confidence_score < THRESHOLD:
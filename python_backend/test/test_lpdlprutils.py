@@ -0,0 +1,19 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), '..'))
+from models.lpdlprnet.lpdlprutils import get_coefficients
+
+
+def test_get_coefficients_orders_segments_numerically():
+    # Keys as built by map_confidence_to_chunk: the full image maps to ''
+    conf = {'2': 0.5, '0': 0.7, '': 0.9, '1': 0.6}
+    np.testing.assert_allclose(get_coefficients(conf), [0.2, 0.3, 0.4])
+
+
+def test_get_coefficients_sorts_multi_digit_keys_as_integers():
+    conf = {'10': 0.85, '': 0.8, '2': 0.3}
+    np.testing.assert_allclose(get_coefficients(conf), [0.5, -0.05])
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import cv2 as cv
+import numpy as np
+import pytest
+from numba.typed import List
+
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), '..', 'triton_client'))
+from tao_triton.python.preprocessing.lpr_preprocessing import lpr_preprocess_batch
+
+OUT_H, OUT_W = 48, 96
+SCALE = 1 / 255.0
+
+
+def reference(image, mean):
+    # Resize in float so OpenCV's fixed point uint8 weights don't add error
+    resized = cv.resize(image.astype(np.float32), (OUT_W, OUT_H),
+                        interpolation=cv.INTER_LINEAR)
+    resized = resized.reshape(OUT_H, OUT_W, image.shape[2])
+    return (resized - mean) * SCALE
+
+
+@pytest.mark.parametrize("channels", [1, 3])
+@pytest.mark.parametrize("channels_first", [True, False])
+def test_lpr_preprocess_batch_matches_cv_resize(channels, channels_first):
+    rng = np.random.default_rng(0)
+    # Downscaled, upscaled and mixed crops in one batch
+    sizes = [(120, 300), (30, 50), (48, 96), (97, 61)]
+    images = [rng.integers(0, 256, (h, w, channels), dtype=np.uint8) for h, w in sizes]
+    raw_list = List()
+    for image in images:
+        raw_list.append(image)
+    mean = np.linspace(0, 120, channels).astype(np.float32)
+    if channels_first:
+        out = np.empty((len(images) + 1, channels, OUT_H, OUT_W), dtype=np.float32)
+    else:
+        out = np.empty((len(images) + 1, OUT_H, OUT_W, channels), dtype=np.float32)
+    out[-1] = -1
+
+    lpr_preprocess_batch(raw_list, out, mean, SCALE, channels_first)
+
+    for idx, image in enumerate(images):
+        expected = reference(image, mean)
+        if channels_first:
+            expected = expected.transpose(2, 0, 1)
+        np.testing.assert_allclose(out[idx], expected, atol=1e-4)
+    # Entries past the batch are left untouched
+    assert (out[-1] == -1).all()
@@ -108,16 +108,21 @@ class TritonModel(object):
         }
         return config_dict
 
-    def preprocess(self, image):
+    def preprocess(self, image, out=None):
         """Function to preprocess image
 
         Performs mean subtraction and then normalization.
 
         Args:
             image (np.ndarray): Numpy ndarray of an input batch.
+            out (np.ndarray): Optional preallocated array, e.g. a slot of a
+                batch buffer, to write the result into.
 
         Returns:
             image (np.ndarray): Preprocessed input image.
         """
-        image = (image - self.mean) * self.scale
-        return image
+        if out is None:
+            return (image - self.mean) * self.scale
+        np.subtract(image, self.mean, out=out)
+        np.multiply(out, self.scale, out=out)
+        return out
@@ -24,7 +24,6 @@
 import os
 
 import numpy as np
-from sklearn.cluster import DBSCAN as dbscan
 from google.protobuf.text_format import Merge as merge_text_proto
 
 from tao_triton.python.postprocessing.postprocessor_lprnet import Postprocessor
@@ -72,16 +71,16 @@ class LprnetPostprocessor(Postprocessor):
         # Format the dbscan elements into classwise configurations for rendering.
         # self.configure()
 
-    def apply(self, results, this_id, mapping_dictionary, render=True):
+    def apply(self, results, this_id, mapping_list, render=True):
         """Apply the post processing
         
         This function takes the raw output from the lprnet model
-        and maps output into their corresponding license plate characters as per mapping_dictionary parsed into the function
+        and maps output into their corresponding license plate characters as per mapping_list parsed into the function
 
        Args:
             results: Triton Server Response for each batch of image
             this_id: Unique ID for each response
-            mapping_dictionary: dictionary to map to triton output to corresponding license plate character
+            mapping_list: list indexed by triton output to get the corresponding license plate character
         Returns:
             batch_results: returns a list containing predicted license plate, confidence score and file name for each iamge in the batch
 
@@ -96,7 +95,7 @@ class LprnetPostprocessor(Postprocessor):
         predictions = output_array["tf_op_layer_ArgMax"]
         confidence_score = output_array["tf_op_layer_Max"]
 
-        length_dict = len(mapping_dictionary)
+        length_mapping = len(mapping_list)
 
         batch_results = []
         for image_idx in range(self.batch_size):
@@ -109,11 +108,11 @@ class LprnetPostprocessor(Postprocessor):
             current_frame = self.frames[current_idx]
             filename = os.path.basename(current_frame._image_path)
 
-            #Mapping into license plates based on mapping_dictionary
+            #Mapping into license plates based on mapping_list
             for key_counter in range(len(predictions[image_idx])):
                 key = predictions[image_idx][key_counter]
-                if (key != prev_char) & (key < length_dict):
-                    license_plate+=mapping_dictionary[key]
+                if (key != prev_char) & (key < length_mapping):
+                    license_plate+=mapping_list[key]
                     confidence_scores_indv_image.append(np.float64(confidence_score[image_idx][key_counter]))
                 prev_char = key
             batch_results.append([license_plate, confidence_scores_indv_image, filename])
@@ -228,7 +228,7 @@ def plot_keypoints(results, image_filename, image_path, render_limbs=True):
     stickwidth = 1  # width of limb connections
     radius = 2  # radius of keypoint circles
     canvas = cv.imread(image_path)
-    to_plot = cv.imread(image_path)
+    to_plot = canvas.copy()
     for person in image_res:
         total = person['total']
         person = list(person.items())
@@ -0,0 +1,88 @@
+"""Batched image preprocessing for the LPRNet Triton model."""
+
+import cv2 as cv
+import numpy as np
+from numba import njit, prange
+
+
+def load_raw_image(image_path, channels):
+    """Read and decode an image file into an unscaled HWC uint8 array.
+
+    The raw bytes are read with NumPy and decoded with cv.imdecode, both of
+    which release the GIL, so this can be mapped over several files from a
+    thread pool.
+
+    Args:
+        image_path (str): Unix path to the image file.
+        channels (int): Number of channels expected by the model (1 or 3).
+
+    Returns:
+        np.ndarray: Contiguous uint8 array of shape (H, W, channels) in RGB
+            (or grayscale) order.
+    """
+    raw_bytes = np.fromfile(image_path, dtype=np.uint8)
+    # Like the PIL loader used elsewhere, ignore any EXIF orientation tag.
+    if channels == 1:
+        image = cv.imdecode(raw_bytes, cv.IMREAD_GRAYSCALE | cv.IMREAD_IGNORE_ORIENTATION)
+    else:
+        image = cv.imdecode(raw_bytes, cv.IMREAD_COLOR | cv.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        raise ValueError("Cannot decode image at {}".format(image_path))
+
+    if channels == 1:
+        image = image[:, :, np.newaxis]
+    else:
+        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+    return np.ascontiguousarray(image)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def lpr_preprocess_batch(raw_list, out, mean, scale, channels_first):
+    """Resize, normalize and lay out a batch of raw images into out.
+
+    Every image is bilinearly resized to the spatial size of out, has the
+    per-channel mean subtracted and is multiplied by scale. Images are
+    processed in parallel over the batch dimension.
+
+    Args:
+        raw_list (numba.typed.List): uint8 images of shape (H, W, C).
+        out (np.ndarray): Preallocated output buffer of shape (N, C, H, W)
+            if channels_first else (N, H, W, C). Only the first
+            len(raw_list) entries are written.
+        mean (np.ndarray): Per-channel mean of shape (C,).
+        scale (float): Normalization factor applied after mean subtraction.
+        channels_first (bool): Whether out is in CHW order.
+    """
+    if channels_first:
+        out_c = out.shape[1]
+        out_h = out.shape[2]
+        out_w = out.shape[3]
+    else:
+        out_h = out.shape[1]
+        out_w = out.shape[2]
+        out_c = out.shape[3]
+
+    for b in prange(len(raw_list)):
+        image = raw_list[np.int64(b)]
+        in_h = image.shape[0]
+        in_w = image.shape[1]
+        ratio_y = in_h / out_h
+        ratio_x = in_w / out_w
+        for y in range(out_h):
+            src_y = min(max((y + 0.5) * ratio_y - 0.5, 0.0), in_h - 1.0)
+            y0 = int(src_y)
+            y1 = min(y0 + 1, in_h - 1)
+            wy = src_y - y0
+            for x in range(out_w):
+                src_x = min(max((x + 0.5) * ratio_x - 0.5, 0.0), in_w - 1.0)
+                x0 = int(src_x)
+                x1 = min(x0 + 1, in_w - 1)
+                wx = src_x - x0
+                for c in range(out_c):
+                    top = image[y0, x0, c] * (1.0 - wx) + image[y0, x1, c] * wx
+                    bottom = image[y1, x0, c] * (1.0 - wx) + image[y1, x1, c] * wx
+                    value = (top * (1.0 - wy) + bottom * wy - mean[c]) * scale
+                    if channels_first:
+                        out[b, c, y, x] = value
+                    else:
+                        out[b, y, x, c] = value
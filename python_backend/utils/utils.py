@@ -2,7 +2,6 @@
 from PIL import ImageDraw, Image
 import cv2 as cv
 import numpy as np
-import pandas as pd
 import os
 import math
 from datetime import datetime
@@ -14,21 +13,21 @@ def render_image(frame, bboxes, output_image_file, outline_color='yellow', linew
     image = Image.open(frame)
     draw = ImageDraw.Draw(image)
     for bbox_info in bboxes:
-        box = [value for key, value in bbox_info.items() if 'bbox' in key.lower()][0]
+        if 'bbox' in bbox_info:
+            box = bbox_info['bbox']
+        else:
+            # Some APIs rename the key per bbox, e.g. '0_bbox', '1_bbox'
+            box = next(value for key, value in bbox_info.items() if 'bbox' in key.lower())
         if (box[2] - box[0]) >= 0 and (box[3] - box[1]) >= 0:
-            draw.rectangle(box, outline=outline_color)
-            for i in range(linewidth):
-                x1 = max(0, box[0] - i)
-                y1 = max(0, box[1] - i)
-                x2 = min(image.size[0], box[2] + i)
-                y2 = min(image.size[1], box[3] + i)
-                draw.rectangle(box, outline=outline_color)
+            draw.rectangle(box, outline=outline_color, width=linewidth)
     image.save(output_image_file)
 
 
-def crop_image(frame, box, output_cropped_file):
-    """Create crop image """
-    image = Image.open(frame)
+def crop_image(frame, box, output_cropped_file, image=None):
+    """Create crop image. An already opened image of frame can be passed
+    in to avoid decoding the same file again for every box."""
+    if image is None:
+        image = Image.open(frame)
     if (box[2] - box[0]) >= 0 and (box[3] - box[1]) >= 0:
         image = image.crop((box[0],box[1],box[2],box[3]))
     image.save(output_cropped_file,"JPEG")
@@ -79,14 +78,27 @@ def plot_keypoints(results, image_filename, image_path, output_path, render_limb
     stickwidth = 1  # width of limb connections
     radius = 2  # radius of keypoint circles
     canvas = cv.imread(image_path)
-    to_plot = cv.imread(image_path)
+    to_plot = canvas.copy()
+    # Gather every keypoint centre first so that all circles are rasterised
+    # with a single vectorised write instead of one cv.circle call each.
+    centers = []
+    color_idx = []
     for person in image_res:
-        total = person['total']
-        person = list(person.items())
-        for i in range(total-2):  # exclude last 2 elements which are score and total keypoints
-            center = person[i][1]
-            cv.circle(canvas, (int(center[0]), int(
-                center[1])), radius, colors[i], thickness=-1)
+        keypoints = list(person.values())
+        for i in range(person['total']-2):  # exclude last 2 elements which are score and total keypoints
+            centers.append(keypoints[i][:2])
+            color_idx.append(i)
+    if centers:
+        centers = np.asarray(centers).astype(np.int32)
+        dy, dx = np.mgrid[-radius:radius+1, -radius:radius+1]
+        disk = (dy*dy + dx*dx) <= radius*radius
+        # (num_keypoints, num_disk_pixels) canvas coordinates of every circle
+        ys = centers[:, 1, np.newaxis] + dy[disk]
+        xs = centers[:, 0, np.newaxis] + dx[disk]
+        palette = np.asarray(colors, dtype=canvas.dtype)[color_idx]
+        pixel_colors = np.broadcast_to(palette[:, np.newaxis, :], ys.shape + (3,))
+        inside = (ys >= 0) & (ys < canvas.shape[0]) & (xs >= 0) & (xs < canvas.shape[1])
+        canvas[ys[inside], xs[inside]] = pixel_colors[inside]
     to_plot = cv.addWeighted(to_plot, 0.3, canvas, 0.7, 0)
 
     if not render_limbs: